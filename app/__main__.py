@@ -0,0 +1,14 @@
+import os
+
+import uvicorn
+
+# Arranque local con `python -m app`, con el mismo loop y parser HTTP que el Dockerfile
+# (uvloop y httptools vienen con uvicorn[standard])
+if __name__ == "__main__":
+    uvicorn.run(
+        "app.main:app",
+        host=os.getenv("HOST", "127.0.0.1"),
+        port=int(os.getenv("PORT", "8000")),
+        loop="uvloop",
+        http="httptools",
+    )
@@ -0,0 +1,36 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+# Ventana de espera (segundos) para agrupar llamadas concurrentes a los listados
+LIST_LINGER = 0.0005
+
+
+class SingleflightGate:
+    """
+    Agrupa peticiones idénticas concurrentes: solo la primera llega al upstream
+    y el resto espera su resultado.
+    """
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+
+    async def run(self, key: Hashable, fetch: Callable[[], Awaitable[T]], linger: float = 0) -> T:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch(fetch, linger))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._discard(key, done))
+        # shield: si un cliente se desconecta no se cancela la petición de los demás
+        return await asyncio.shield(task)
+
+    def _discard(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    @staticmethod
+    async def _fetch(fetch: Callable[[], Awaitable[T]], linger: float) -> T:
+        if linger:
+            await asyncio.sleep(linger)
+        return await fetch()
@@ -0,0 +1,223 @@
+import asyncio
+import functools
+import hashlib
+import time
+
+from fastapi import Request, Response
+import orjson
+import redis.asyncio as redis
+
+from app.core.batching import SingleflightGate
+from app.core.config import REDIS_URL
+from app.core.http_client import drain_response
+
+# Cache-aside en Redis para los GET idempotentes del gateway
+CACHE_PREFIX = "oncoapp:cache"
+
+# TTL (segundos) por política
+CACHE_POLICIES = {
+    "short": 5,
+    "normal": 30,
+    "long": 60,
+}
+
+# Timeouts (segundos) de Redis: si no responde a tiempo la petición sigue como un fallo de caché
+REDIS_TIMEOUT = 0.25
+
+# Tiempo (segundos) que una entrada expirada se sigue sirviendo mientras se revalida
+STALE_WINDOW = 3600
+
+# Revalidaciones en segundo plano: agrupadas por clave y referenciadas hasta que terminan
+_refreshes = SingleflightGate()
+_revalidations: set[asyncio.Task] = set()
+
+_redis: redis.Redis | None = None
+
+
+async def init_cache() -> None:
+    global _redis
+    if REDIS_URL and _redis is None:
+        _redis = redis.from_url(REDIS_URL, socket_connect_timeout=REDIS_TIMEOUT, socket_timeout=REDIS_TIMEOUT)
+
+
+async def close_cache() -> None:
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
+
+
+def cache_key(request: Request, params: tuple[str, ...] | None = None) -> str:
+    """
+    `params` limita la clave a los query params que llegan al upstream (por defecto, todos),
+    para que añadir parámetros ignorados no genere entradas nuevas.
+    """
+    query = request.query_params
+    if params is None:
+        items = sorted(query.multi_items())
+    else:
+        items = [(k, v) for k in sorted(params) if (v := query.get(k)) is not None]
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(request.url.path.encode())
+    digest.update(repr(items).encode())
+    digest.update(request.headers.get("authorization", "").encode())
+    return f"{CACHE_PREFIX}:{request.url.path}|{digest.hexdigest()}"
+
+
+# Índices para invalidar sin recorrer Redis con SCAN:
+#   index:{ruta}      -> claves cacheadas de esa ruta exacta
+#   tag:{directorio}  -> rutas cacheadas bajo ese directorio ("/clinical_histories/document/")
+def _index_key(path: str) -> str:
+    return f"{CACHE_PREFIX}-index:{path}"
+
+
+def _tag_key(directory: str) -> str:
+    return f"{CACHE_PREFIX}-tag:{directory}"
+
+
+def _directories(path: str) -> list[str]:
+    # "/a/b/c" -> ["/a/", "/a/b/"]; "/a/" -> ["/a/"]
+    return [path[:i + 1] for i, char in enumerate(path) if char == "/" and i > 0]
+
+
+async def _get(key: str) -> dict | None:
+    try:
+        entry = await _redis.hgetall(key)
+    except (redis.RedisError, OSError):
+        return None
+    return entry or None
+
+
+async def _set(key: str, path: str, status: int, headers: dict, body: bytes, ttl: int) -> None:
+    expiry = ttl + STALE_WINDOW
+    try:
+        async with _redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping={
+                "status": status,
+                "headers": orjson.dumps(headers),
+                "body": body,
+                "stale_at": time.time() + ttl,
+            })
+            pipe.expire(key, expiry)
+            pipe.sadd(_index_key(path), key)
+            pipe.expire(_index_key(path), expiry)
+            for directory in _directories(path):
+                pipe.sadd(_tag_key(directory), path)
+                pipe.expire(_tag_key(directory), expiry)
+            await pipe.execute()
+    except (redis.RedisError, OSError):
+        pass
+
+
+async def _delete_paths(paths: list[str], *extra: str) -> None:
+    indexes = [_index_key(path) for path in paths]
+    async with _redis.pipeline(transaction=False) as pipe:
+        for index in indexes:
+            pipe.smembers(index)
+        members = await pipe.execute()
+    keys = [key for keys in members for key in keys]
+    if keys or indexes or extra:
+        await _redis.delete(*keys, *indexes, *extra)
+
+
+async def invalidate(*paths: str) -> None:
+    """
+    Elimina las entradas cacheadas de las rutas exactas indicadas.
+    """
+    if _redis is None or not paths:
+        return
+    try:
+        await _delete_paths(list(paths))
+    except (redis.RedisError, OSError):
+        pass
+
+
+async def invalidate_prefix(*prefixes: str) -> None:
+    """
+    Elimina las entradas cacheadas de todas las rutas que empiezan por el prefijo.
+    """
+    if _redis is None:
+        return
+    try:
+        for prefix in prefixes:
+            tag = _tag_key(prefix[:prefix.rfind("/") + 1])
+            paths = [path.decode() for path in await _redis.smembers(tag)]
+            matching = [path for path in paths if path.startswith(prefix)]
+            # El tag solo se borra si el prefijo cubre el directorio completo
+            await _delete_paths(matching, *([tag] if len(matching) == len(paths) else []))
+    except (redis.RedisError, OSError):
+        pass
+
+
+def _cached_response(entry: dict, status: str) -> Response:
+    headers = orjson.loads(entry[b"headers"])
+    headers["X-Cache"] = status
+    if status == "STALE":
+        headers["Warning"] = '110 - "Response is Stale"'
+    return Response(content=entry[b"body"], status_code=int(entry[b"status"]), headers=headers)
+
+
+def _cacheable(result: Response) -> bool:
+    return result.status_code < 300
+
+
+async def _store(key: str, path: str, result: Response, ttl: int) -> Response:
+    # El cuerpo del upstream se guarda tal cual llega, sin re-serializar
+    status, headers, body = await drain_response(result)
+    await _set(key, path, status, headers, body, ttl)
+    return Response(content=body, status_code=status, headers={**headers, "X-Cache": "MISS"})
+
+
+async def _revalidate(key: str, path: str, handler, args, kwargs, ttl: int) -> None:
+    try:
+        result = await handler(*args, **kwargs)
+    except Exception:
+        return  # sin reintento: lo lanzará la siguiente petición que encuentre la entrada expirada
+    if _cacheable(result):
+        await _store(key, path, result, ttl)
+    else:
+        await drain_response(result)
+
+
+def _refresh(key: str, path: str, handler, args, kwargs, ttl: int) -> None:
+    # Una sola revalidación en curso por clave, aunque lleguen muchas peticiones a la vez
+    task = asyncio.create_task(_refreshes.run(key, lambda: _revalidate(key, path, handler, args, kwargs, ttl)))
+    _revalidations.add(task)
+    task.add_done_callback(_revalidations.discard)
+
+
+def cached(policy: str = "normal", params: tuple[str, ...] | None = None):
+    """
+    Cachea la respuesta exitosa de un handler GET. El handler debe recibir `request: Request`.
+    `params` son los query params que forman parte de la clave (ver `cache_key`).
+
+    Stale-while-revalidate: una entrada expirada dentro de `STALE_WINDOW` se sirve al momento
+    con `X-Cache: STALE` y se refresca una vez en segundo plano. Si el refresco falla no se
+    reintenta; la entrada se sigue sirviendo y la siguiente petición lanza otro.
+    """
+    ttl = CACHE_POLICIES[policy]
+
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(*args, **kwargs):
+            request: Request = kwargs["request"]
+            if _redis is None:
+                return await handler(*args, **kwargs)
+
+            key = cache_key(request, params)
+            entry = await _get(key)
+            if entry is not None:
+                if float(entry[b"stale_at"]) >= time.time():
+                    return _cached_response(entry, "HIT")
+                _refresh(key, request.url.path, handler, args, kwargs, ttl)
+                return _cached_response(entry, "STALE")
+
+            result = await handler(*args, **kwargs)
+            if not _cacheable(result):
+                return result
+            return await _store(key, request.url.path, result, ttl)
+
+        return wrapper
+
+    return decorator
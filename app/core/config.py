@@ -5,4 +5,14 @@ load_dotenv()
 
 AUTH_SERVICE_URL = os.getenv("AUTH_URL", "https://oncoapp-239j.onrender.com")
 PATIENT_SERVICE_URL = os.getenv("PATIENT_URL", "https://patientoncoassist.onrender.com")
-RECOMMENDATION_SERVICE_URL = os.getenv("RECOMMENDATION_URL", "https://oncoai-4rec.onrender.com")
\ No newline at end of file
+RECOMMENDATION_SERVICE_URL = os.getenv("RECOMMENDATION_URL", "https://oncoai-4rec.onrender.com")
+
+HTTPX_HTTP2_ENABLED = os.getenv("HTTPX_HTTP2_ENABLED", "true").lower() in ("1", "true", "yes")
+
+REDIS_URL = os.getenv("REDIS_URL")
+
+# Despliegues internos de confianza: el gateway no valida los cuerpos y deja la validación al upstream
+TRUST_INPUT = os.getenv("TRUST_INPUT", "false").lower() in ("1", "true", "yes")
+
+# Orígenes permitidos por CORS, separados por comas (p. ej. "https://oncoapp.com,https://admin.oncoapp.com")
+CORS_ORIGINS = [origin.strip() for origin in os.getenv("CORS_ORIGINS", "*").split(",") if origin.strip()]
\ No newline at end of file
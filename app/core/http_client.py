@@ -0,0 +1,217 @@
+import asyncio
+import logging
+
+from fastapi import HTTPException
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
+import httpx
+
+from app.core.batching import SingleflightGate
+from app.core.config import (
+    AUTH_SERVICE_URL,
+    HTTPX_HTTP2_ENABLED,
+    PATIENT_SERVICE_URL,
+    RECOMMENDATION_SERVICE_URL,
+)
+
+# Logger de uvicorn: es el que su configuración por defecto muestra a nivel INFO
+logger = logging.getLogger("uvicorn.error")
+
+AUTH = "auth"
+PATIENT = "patient"
+RECOMMENDATION = "recommendation"
+
+# Un pool de conexiones keep-alive por upstream: la saturación de uno no bloquea a los demás
+UPSTREAMS = {
+    AUTH: {
+        "base_url": AUTH_SERVICE_URL,
+        "timeout": httpx.Timeout(connect=5, read=120, write=30, pool=10),
+        "limits": httpx.Limits(max_connections=200, max_keepalive_connections=100, keepalive_expiry=30),
+    },
+    PATIENT: {
+        "base_url": PATIENT_SERVICE_URL,
+        "timeout": httpx.Timeout(connect=2, read=10, write=5, pool=2),
+        "limits": httpx.Limits(max_keepalive_connections=64),
+    },
+    RECOMMENDATION: {
+        "base_url": RECOMMENDATION_SERVICE_URL,
+        # La inferencia usa su propio timeout de lectura (ver predict_and_update_treatment)
+        "timeout": httpx.Timeout(connect=2, read=8, write=5, pool=2),
+        "limits": httpx.Limits(max_keepalive_connections=16),
+    },
+}
+
+# Reintentos del transporte ante fallos de conexión (ConnectError/ConnectTimeout). Solo se
+# reintenta antes de enviar nada al upstream, así que es seguro también para POST/PUT
+CONNECT_RETRIES = 2
+
+_clients: dict[str, httpx.AsyncClient] = {}
+
+# Máximo de peticiones en curso por upstream; el resto espera como mucho
+# ACQUIRE_TIMEOUT segundos y luego recibe un 503 en lugar de acumularse
+CONCURRENCY = {
+    AUTH: 100,
+    PATIENT: 64,
+    RECOMMENDATION: 16,
+}
+ACQUIRE_TIMEOUT = 0.5
+
+_semaphores = {upstream: asyncio.Semaphore(limit) for upstream, limit in CONCURRENCY.items()}
+
+# Tamaño máximo (bytes) del cuerpo de error del upstream que se lee y se devuelve al cliente
+ERROR_BODY_LIMIT = 2048
+
+# Headers que no deben reenviarse al cliente (hop-by-hop o recalculados por el servidor)
+HOP_BY_HOP_HEADERS = frozenset({
+    "connection",
+    "content-length",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailer",
+    "transfer-encoding",
+    "upgrade",
+})
+
+# GETs idénticos en curso (mismo método, URL y headers) comparten una única llamada al upstream
+_gets = SingleflightGate()
+
+
+def get_client(upstream: str) -> httpx.AsyncClient:
+    client = _clients.get(upstream)
+    if client is None:
+        config = dict(UPSTREAMS[upstream])
+        # Con un transporte explícito httpx ignora `http2` y `limits` del cliente: van en el transporte
+        transport = httpx.AsyncHTTPTransport(
+            http2=HTTPX_HTTP2_ENABLED,
+            limits=config.pop("limits"),
+            retries=CONNECT_RETRIES,
+        )
+        client = _clients[upstream] = httpx.AsyncClient(transport=transport, **config)
+    return client
+
+
+def _http2_enabled(client: httpx.AsyncClient) -> bool:
+    # httpx no expone si el pool negocia HTTP/2; se lee del pool de httpcore
+    pool = getattr(client._transport, "_pool", None)
+    return bool(getattr(pool, "_http2", False))
+
+
+def init_clients() -> None:
+    for upstream in UPSTREAMS:
+        client = get_client(upstream)
+        logger.info("Cliente %s: %s (HTTP/2: %s)", upstream, client.base_url, _http2_enabled(client))
+
+
+async def close_clients() -> None:
+    while _clients:
+        _, client = _clients.popitem()
+        await client.aclose()
+
+
+async def read_error_body(response: httpx.Response) -> bytes:
+    """
+    Lee como máximo `ERROR_BODY_LIMIT` bytes del cuerpo de error y cierra la respuesta.
+    """
+    if response.is_stream_consumed:
+        return response.content[:ERROR_BODY_LIMIT]
+    chunks, size = [], 0
+    try:
+        async for chunk in response.aiter_bytes():
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= ERROR_BODY_LIMIT:
+                break
+    finally:
+        await response.aclose()
+    return b"".join(chunks)[:ERROR_BODY_LIMIT]
+
+
+async def _read_shared(response: httpx.Response) -> httpx.Response:
+    """
+    Lee la respuesta de un GET compartido. Los errores se truncan a `ERROR_BODY_LIMIT` bytes
+    antes de compartirse, para no cargar en memoria cuerpos de error arbitrariamente grandes.
+    """
+    if response.status_code < 400:
+        await response.aread()
+        return response
+    body = await read_error_body(response)
+    # El cuerpo ya está descomprimido y truncado: se descartan content-encoding y content-length
+    headers = [(k, v) for k, v in response.headers.raw if k.lower() not in (b"content-encoding", b"content-length")]
+    return httpx.Response(response.status_code, headers=headers, content=body, request=response.request)
+
+
+async def _send(upstream: str, client: httpx.AsyncClient, request: httpx.Request, read: bool = False) -> httpx.Response:
+    semaphore = _semaphores[upstream]
+    try:
+        await asyncio.wait_for(semaphore.acquire(), timeout=ACQUIRE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail=f"Servicio {upstream} saturado, inténtalo de nuevo")
+    try:
+        response = await client.send(request, stream=True)
+        return await _read_shared(response) if read else response
+    finally:
+        semaphore.release()
+
+
+async def send_stream(upstream: str, method: str, url: str, linger: float = 0, **kwargs) -> httpx.Response:
+    """
+    Envía la petición al upstream (`url` relativa a su base) sin leer el cuerpo de la respuesta.
+
+    Los GET se comparten entre llamadas idénticas concurrentes y se devuelven ya leídos;
+    `linger` retrasa el envío para agrupar más llamadas. Si el upstream tiene todas sus
+    plazas ocupadas se responde 503.
+    """
+    client = get_client(upstream)
+    request = client.build_request(method, url, **kwargs)
+    if method == "GET":
+        # La clave incluye todos los headers enviados: quien se une a una llamada en curso
+        # recibe exactamente la respuesta que habría obtenido con su propia petición
+        key = (method, str(request.url), tuple(sorted(request.headers.raw)))
+        return await _gets.run(key, lambda: _send(upstream, client, request, read=True), linger=linger)
+    return await _send(upstream, client, request)
+
+
+def _safe_headers(headers: httpx.Headers) -> dict:
+    return {k: v for k, v in headers.items() if k.lower() not in HOP_BY_HOP_HEADERS}
+
+
+def stream_response(response: httpx.Response, status_code: int | None = None) -> Response:
+    """
+    Reenvía al cliente el cuerpo del upstream sin decodificar ni re-serializar el JSON.
+    `status_code` sustituye al estado del upstream (p. ej. 201 de la ruta ante un 200 del upstream).
+
+    El cuerpo se entrega descomprimido: el `Accept-Encoding` del cliente no llega al upstream
+    (httpx negocia gzip por su cuenta), así que no se reenvía `content-encoding`.
+    """
+    headers = _safe_headers(response.headers)
+    headers.pop("content-encoding", None)
+    if response.is_stream_consumed:
+        # Respuesta compartida ya leída: se envía con Content-Length en vez de chunked
+        return Response(
+            content=response.content,
+            status_code=status_code or response.status_code,
+            headers=headers,
+            media_type=response.headers.get("content-type"),
+        )
+    return StreamingResponse(
+        response.aiter_bytes(),
+        status_code=status_code or response.status_code,
+        headers=headers,
+        media_type=response.headers.get("content-type"),
+        background=BackgroundTask(response.aclose),
+    )
+
+
+async def drain_response(response: Response) -> tuple[int, dict, bytes]:
+    """
+    Lee por completo una respuesta de `stream_response` y libera la conexión del upstream.
+    Devuelve `(status, headers, body)` para guardarla o reutilizarla.
+    """
+    if not isinstance(response, StreamingResponse):
+        return response.status_code, dict(response.headers), response.body
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    if response.background is not None:
+        await response.background()
+    return response.status_code, dict(response.headers), body
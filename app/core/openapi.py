@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+
+
+def json_body(model: type[BaseModel], required: bool = True) -> dict:
+    """
+    `openapi_extra` que documenta el cuerpo JSON de una ruta que lo reenvía al upstream sin validarlo.
+    """
+    return {
+        "requestBody": {
+            "required": required,
+            "content": {"application/json": {"schema": model.model_json_schema()}},
+        }
+    }
@@ -0,0 +1,195 @@
+import functools
+import inspect
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Request
+from fastapi.responses import ORJSONResponse, Response
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from pydantic import BaseModel
+import httpx
+import orjson
+
+from app.core.cache import cached, invalidate, invalidate_prefix
+from app.core.http_client import drain_response, read_error_body, send_stream, stream_response
+from app.core.openapi import json_body
+
+security = HTTPBearer(auto_error=False)
+
+_PATH_PARAM = re.compile(r"{(\w+)}")
+
+# Headers del cliente que se reenvían al upstream (el resto, incluido Host, se descarta).
+# Se comparan en bytes contra los headers crudos del scope ASGI para no decodificarlos.
+FORWARDED_HEADERS = frozenset({b"authorization", b"accept", b"content-type", b"user-agent", b"x-request-id"})
+PUBLIC_FORWARDED_HEADERS = FORWARDED_HEADERS - {b"authorization"}
+
+
+@dataclass(frozen=True)
+class ProxyRoute:
+    """
+    Ruta del gateway que se reenvía sin transformar a un endpoint del upstream.
+    """
+    method: str
+    path: str
+    name: str
+    endpoint: str | None = None  # ruta en el upstream; por defecto igual a `path`
+    description: str | None = None
+    requires_auth: bool = True
+    status_code: int = 200
+    response_schema: Any = None  # solo para OpenAPI; la respuesta del upstream no se valida
+    body: type[BaseModel] | None = None  # solo documenta el cuerpo; se reenvía sin validar
+    path_types: dict[str, type] = field(default_factory=dict)
+    query: dict[str, tuple[Any, Any]] = field(default_factory=dict)  # nombre -> (tipo, Query(...))
+    cache: str | None = None
+    memo: float = 0  # segundos que la respuesta exitosa se reutiliza en memoria del proceso (rutas públicas)
+    linger: float = 0
+    invalidates: tuple[str, ...] = ()
+    invalidates_prefix: tuple[str, ...] = ()
+
+
+def _signature(route: ProxyRoute) -> inspect.Signature:
+    kw = inspect.Parameter.KEYWORD_ONLY
+    params = [inspect.Parameter("request", kw, annotation=Request)]
+    for name in _PATH_PARAM.findall(route.path):
+        params.append(inspect.Parameter(name, kw, annotation=route.path_types.get(name, str), default=Path()))
+    for name, (annotation, default) in route.query.items():
+        params.append(inspect.Parameter(name, kw, annotation=annotation, default=default))
+    params.append(inspect.Parameter(
+        "token", kw, annotation=HTTPAuthorizationCredentials | None, default=Depends(security)
+    ))
+    return inspect.Signature(params)
+
+
+def auth_headers(required: bool = True, **fixed: str):
+    """
+    Fábrica de dependencias que devuelve los headers para el upstream con el token del cliente.
+    Los headers fijos (`content_type="application/json"` → `content-type`) se construyen
+    una sola vez al declarar la ruta; por petición solo se añade `authorization`.
+    """
+    base = {name.replace("_", "-"): value for name, value in fixed.items()}
+
+    async def dependency(
+        request: Request,
+        token: HTTPAuthorizationCredentials | None = Depends(security)
+    ) -> dict[str, str]:
+        if token is None:
+            if required:
+                raise HTTPException(status_code=401, detail="No autenticado", headers={"WWW-Authenticate": "Bearer"})
+            return base
+        # Se reenvía el header original en vez de recomponer "Bearer {token}"
+        return {**base, "authorization": request.headers["authorization"]}
+
+    return dependency
+
+
+async def error_response(response: httpx.Response) -> ORJSONResponse:
+    body = await read_error_body(response)
+    if response.headers.get("content-type", "").startswith("application/json"):
+        try:
+            return ORJSONResponse(status_code=response.status_code, content=orjson.loads(body))
+        except orjson.JSONDecodeError:
+            pass
+    return ORJSONResponse(status_code=response.status_code, content={"detail": body.decode("utf-8", "replace")})
+
+
+def _memoize(handler, ttl: float):
+    """
+    Reutiliza durante `ttl` segundos la última respuesta exitosa del handler. Las llamadas
+    concurrentes con la entrada expirada ya comparten una única petición al upstream (y su
+    fallo, si lo hay) a través del agrupamiento de GETs de `send_stream`.
+    """
+    entry: tuple[float, int, dict, bytes] | None = None  # (expires_at, status, headers, body)
+
+    @functools.wraps(handler)
+    async def wrapper(*args, **kwargs):
+        nonlocal entry
+        if entry is None or entry[0] <= time.monotonic():
+            result = await handler(*args, **kwargs)
+            if result.status_code >= 300:
+                return result  # los errores no se memorizan
+            status, headers, body = await drain_response(result)
+            entry = (time.monotonic() + ttl, status, headers, body)
+        _, status, headers, body = entry
+        return Response(content=body, status_code=status, headers=headers)
+
+    return wrapper
+
+
+def make_proxy(upstream: str, service: str, route: ProxyRoute):
+    # Ruta del upstream resuelta una sola vez; solo se formatea si tiene parámetros de ruta
+    template = route.endpoint or route.path
+    static_url = None if _PATH_PARAM.search(template) else template
+    # Solo se reenvían al upstream los query params declarados en la tabla
+    allowed_params = tuple(route.query)
+    forwarded_headers = FORWARDED_HEADERS if route.requires_auth else PUBLIC_FORWARDED_HEADERS
+    if route.method == "GET":
+        # Los GET idénticos se agrupan en una sola llamada; un x-request-id por cliente lo impediría
+        forwarded_headers -= {b"x-request-id"}
+    # Cualquier 2xx del upstream se responde con el estado declarado de la ruta (201 en las altas)
+    success_status = route.status_code if route.status_code != 200 else None
+
+    async def proxy(request: Request, token: HTTPAuthorizationCredentials | None = None, **_):
+        # Sin token no se llega a ocupar una conexión del pool
+        if route.requires_auth and token is None:
+            raise HTTPException(status_code=401, detail="No autenticado", headers={"WWW-Authenticate": "Bearer"})
+
+        path_params = request.path_params
+        url = static_url or template.format(**path_params)
+        headers = [(k, v) for k, v in request.scope["headers"] if k in forwarded_headers]
+
+        kwargs = {}
+        if route.method == "GET":
+            query = request.query_params
+            kwargs["params"] = {k: v for k in allowed_params if (v := query.get(k)) is not None}
+            kwargs["linger"] = route.linger
+        elif route.method != "DELETE":
+            # El cuerpo se reenvía tal cual; la validación la hace el upstream
+            if "content-type" not in request.headers:
+                headers.append((b"content-type", b"application/json"))
+            kwargs["content"] = await request.body()
+
+        try:
+            response = await send_stream(upstream, route.method, url, headers=headers, **kwargs)
+        except httpx.RequestError as e:
+            raise HTTPException(status_code=502, detail=f"Error al contactar el servicio de {service}: {e}")
+
+        if response.status_code >= 400:
+            return await error_response(response)
+        # Solo las escrituras invalidan caché; las lecturas no pasan por ningún await extra
+        if route.invalidates:
+            await invalidate(*(path.format(**path_params) for path in route.invalidates))
+        if route.invalidates_prefix:
+            await invalidate_prefix(*route.invalidates_prefix)
+        if route.status_code == 204:
+            # 204 sin cuerpo, aunque el upstream responda 200 con contenido
+            await response.aclose()
+            return Response(status_code=204)
+        return stream_response(response, success_status)
+
+    proxy.__name__ = route.name
+    proxy.__signature__ = _signature(route)
+    if route.memo:
+        proxy = _memoize(proxy, route.memo)
+    if route.cache:
+        proxy = cached(policy=route.cache, params=allowed_params)(proxy)
+    return proxy
+
+
+def add_proxy_routes(router: APIRouter, upstream: str, service: str, routes: list[ProxyRoute]) -> None:
+    """
+    Registra en el router un handler de reenvío por cada ruta de la tabla.
+    """
+    for route in routes:
+        router.add_api_route(
+            route.path,
+            make_proxy(upstream, service, route),
+            methods=[route.method],
+            name=route.name,
+            description=route.description,
+            status_code=route.status_code,
+            response_model=None,
+            responses={route.status_code: {"model": route.response_schema}} if route.response_schema else None,
+            openapi_extra=json_body(route.body) if route.body else None,
+        )
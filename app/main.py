@@ -1,26 +1,44 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import auth_routes, patient_routes, recommendation_routes
+from app.core.cache import init_cache, close_cache
+from app.core.config import CORS_ORIGINS
+from app.core.http_client import init_clients, close_clients
+from app.routes import aggregate_routes, auth_routes, patient_routes, recommendation_routes
+
+# Ciclo de vida de los clientes HTTP compartidos y de la caché
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_clients()
+    await init_cache()
+    yield
+    await close_clients()
+    await close_cache()
 
 app = FastAPI(
     title="OncoApp API Gateway",
     description="Gateway que orquesta los microservicios de OncoApp (Autenticación, Pacientes, etc.)",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Permitir solicitudes desde tu frontend y otros orígenes
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Cambia '*' por tu dominio en producción
+    allow_origins=CORS_ORIGINS,  # Define CORS_ORIGINS con tu dominio en producción
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE"],
+    allow_headers=["authorization", "content-type", "x-request-id"],
+    max_age=86400,
 )
 
 # Incluir rutas de los microservicios
 app.include_router(auth_routes.router, tags=["Autenticación"])
 app.include_router(patient_routes.router, tags=["Pacientes"])
 app.include_router(recommendation_routes.router, tags=["Recomendaciones"])
+app.include_router(aggregate_routes.router, tags=["Agregados"])
 
 @app.get("/")
 def root():
@@ -0,0 +1,17 @@
+from pydantic import BaseModel, ConfigDict
+
+# ---------------------------
+# ⚠️ Errores de validación (formato de FastAPI)
+# ---------------------------
+
+class ValidationError(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
+    loc: list[str | int]
+    msg: str
+    type: str
+
+class HTTPValidationError(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
+    detail: list[ValidationError]
@@ -0,0 +1,66 @@
+from fastapi import APIRouter, Depends, HTTPException, Path
+import asyncio
+import httpx
+import orjson
+
+from app.core.http_client import AUTH, ERROR_BODY_LIMIT, PATIENT, send_stream
+from app.core.proxy import auth_headers
+
+router = APIRouter()
+
+# ---------------------------
+# 🧩 Helpers
+# ---------------------------
+
+def _error(response: httpx.Response | BaseException) -> dict:
+    if isinstance(response, HTTPException):
+        return {"status": response.status_code, "detail": response.detail}
+    if isinstance(response, BaseException):
+        return {"status": 502, "detail": f"Error al contactar el servicio: {response}"}
+    if response.status_code < 400:
+        # Respuesta exitosa cuyo cuerpo no es JSON (p. ej. una página HTML de Render o un 204 vacío)
+        return {"status": 502, "detail": f"Respuesta no JSON del servicio (HTTP {response.status_code})"}
+    body = response.content[:ERROR_BODY_LIMIT]
+    try:
+        detail = orjson.loads(body)
+    except orjson.JSONDecodeError:
+        detail = body.decode("utf-8", "replace")
+    return {"status": response.status_code, "detail": detail}
+
+# ---------------------------
+# 📊 Vistas agregadas
+# ---------------------------
+
+@router.get("/aggregate/patient-dashboard/{document_id}")
+async def patient_dashboard(
+    document_id: str = Path(..., title="Document Id"),
+    headers: dict[str, str] = Depends(auth_headers(accept="application/json"))
+):
+    """
+    Datos del usuario, del paciente y sus historiales clínicos en una sola llamada.
+    Las tres peticiones a los microservicios se hacen en paralelo; si alguna falla,
+    su sección queda en `null` y el error se detalla en `errors`.
+    """
+    urls = {
+        "me": (AUTH, "/me"),
+        "patient": (PATIENT, f"/patients/{document_id}"),
+        "clinical_histories": (PATIENT, f"/clinical_histories/document/{document_id}"),
+    }
+    responses = await asyncio.gather(
+        *(send_stream(upstream, "GET", url, headers=headers) for upstream, url in urls.values()),
+        return_exceptions=True
+    )
+
+    dashboard, errors = {}, {}
+    for name, response in zip(urls, responses):
+        dashboard[name] = None
+        if isinstance(response, BaseException) or response.status_code >= 400:
+            errors[name] = _error(response)
+            continue
+        try:
+            dashboard[name] = orjson.loads(response.content)
+        except orjson.JSONDecodeError:
+            errors[name] = _error(response)
+    if errors:
+        dashboard["errors"] = errors
+    return dashboard
@@ -1,14 +1,12 @@
-from fastapi import APIRouter, Request, HTTPException, Query, Depends
-from fastapi.responses import JSONResponse
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi import APIRouter, Query
 from pydantic import BaseModel
-import httpx
-import os
+
+from app.core.batching import LIST_LINGER
+from app.core.http_client import AUTH
+from app.core.proxy import ProxyRoute, add_proxy_routes
 
 router = APIRouter()
-AUTH_SERVICE_URL = os.getenv("AUTH_URL", "https://oncoapp-239j.onrender.com")
-security = HTTPBearer(auto_error=False)
-print("Auth service URL:", AUTH_SERVICE_URL)
+
 # ---------------------------
 # 🔐 Schemas Pydantic
 # ---------------------------
@@ -65,145 +63,46 @@ class SearchResult(BaseModel):
     medico: MedicoOut
     encontrado_por: str
 
-class ValidationError(BaseModel):
-    loc: list[str | int]
-    msg: str
-    type: str
-
-class HTTPValidationError(BaseModel):
-    detail: list[ValidationError]
-
-# ---------------------------
-# 🔧 Helper para reenviar requests
-# ---------------------------
-
-async def forward_request(
-    method: str,
-    endpoint: str,
-    request: Request,
-    requires_auth: bool = False,
-    json_data: dict | None = None,
-    params: dict | None = None,
-    token: HTTPAuthorizationCredentials | None = None
-):
-    # Solo los headers necesarios
-    headers = {
-        "content-type": "application/json"
-    }
-    if requires_auth and token:
-        headers["authorization"] = f"Bearer {token.credentials}"
-
-    print(f"Reenviando a: {AUTH_SERVICE_URL}{endpoint}")
-
-    async with httpx.AsyncClient() as client:
-        try:
-            if method == "GET":
-                return await client.get(
-                    f"{AUTH_SERVICE_URL}{endpoint}",
-                    headers=headers,
-                    params=params or request.query_params
-                )
-            elif method in ["POST", "PUT", "PATCH"]:
-                data = json_data or await request.json()
-                data = data or {}
-                if method == "POST":
-                    return await client.post(f"{AUTH_SERVICE_URL}{endpoint}", headers=headers, json=data)
-                elif method == "PUT":
-                    return await client.put(f"{AUTH_SERVICE_URL}{endpoint}", headers=headers, json=data)
-                else:
-                    return await client.patch(f"{AUTH_SERVICE_URL}{endpoint}", headers=headers, json=data)
-            else:
-                raise HTTPException(status_code=405, detail="Método no permitido")
-        except httpx.RequestError as e:
-            raise HTTPException(status_code=502, detail=f"Error al contactar el servicio de autenticación: {e}")
-
-def handle_response(response: httpx.Response):
-    if response.status_code >= 400:
-        try:
-            return JSONResponse(status_code=response.status_code, content=response.json())
-        except Exception:
-            return JSONResponse(status_code=response.status_code, content={"detail": response.text})
-    try:
-        return response.json()
-    except Exception:
-        return {"message": response.text}
-
-# ---------------------------
-# 🔐 Rutas públicas
-# ---------------------------
-
-@router.post("/register", status_code=201, response_model=dict)
-async def register(register_in: RegisterIn, request: Request):
-    response = await forward_request("POST", "/register", request, json_data=register_in.dict())
-    return handle_response(response)
-
-@router.post("/login", response_model=TokenOut)
-async def login(login_in: LoginIn, request: Request):
-    response = await forward_request("POST", "/login", request, json_data=login_in.dict())
-    return handle_response(response)
-
-# ---------------------------
-# 👤 Rutas autenticadas
-# ---------------------------
-
-@router.get("/me", response_model=UserOut)
-async def get_me(request: Request, token: HTTPAuthorizationCredentials = Depends(security)):
-    response = await forward_request("GET", "/me", request, requires_auth=True, token=token)
-    return handle_response(response)
-
-# ---------------------------
-# 🧑‍⚕️ Rutas de administración
-# ---------------------------
-
-@router.get("/admin/users", response_model=list[UserOut])
-async def list_users(request: Request, token: HTTPAuthorizationCredentials = Depends(security)):
-    response = await forward_request("GET", "/admin/users", request, requires_auth=True, token=token)
-    return handle_response(response)
-
-@router.get("/admin/medicos", response_model=list[MedicoOut])
-async def list_medicos(request: Request, token: HTTPAuthorizationCredentials = Depends(security)):
-    response = await forward_request("GET", "/admin/medicos", request, requires_auth=True, token=token)
-    return handle_response(response)
-
-@router.get("/admin/user-medico/{user_id}", response_model=UserMedicoUpdateOut)
-async def get_user_medico(user_id: str, request: Request, token: HTTPAuthorizationCredentials = Depends(security)):
-    response = await forward_request("GET", f"/admin/user-medico/{user_id}", request, requires_auth=True, token=token)
-    return handle_response(response)
-
-@router.put("/admin/user-medico/{user_id}", response_model=UserMedicoUpdateOut)
-async def update_user_medico(user_id: str, user_medico_update_in: UserMedicoUpdateIn, request: Request, token: HTTPAuthorizationCredentials = Depends(security)):
-    response = await forward_request(
-        "PUT",
-        f"/admin/user-medico/{user_id}",
-        request,
-        requires_auth=True,
-        json_data=user_medico_update_in.dict(),
-        token=token
-    )
-    return handle_response(response)
-
 # ---------------------------
-# 🔍 Búsquedas
+# 🔀 Tabla de rutas reenviadas
 # ---------------------------
 
-@router.get("/search", response_model=SearchResult)
-async def search_user_medico(
-    request: Request,
-    email: str | None = Query(default=None),
-    tipo_doc: str | None = Query(default=None),
-    doc: str | None = Query(default=None),
-    token: HTTPAuthorizationCredentials = Depends(security)
-):
-    params = {"email": email, "tipo_doc": tipo_doc, "doc": doc}
-    response = await forward_request("GET", "/search", request, requires_auth=True, params=params, token=token)
-    return handle_response(response)
-
-@router.get("/search/flexible", response_model=list[SearchResult])
-async def search_flexible(
-    request: Request,
-    q: str = Query(..., description="Término de búsqueda obligatorio"),
-    token: HTTPAuthorizationCredentials = Depends(security)
-):
-    params = {"q": q}
-    response = await forward_request("GET", "/search/flexible", request, requires_auth=True, params=params, token=token)
-    return handle_response(response)
\ No newline at end of file
+ROUTES = [
+    # 🔐 Rutas públicas
+    ProxyRoute("POST", "/register", "register", requires_auth=False, status_code=201, response_schema=dict, body=RegisterIn),
+    ProxyRoute("POST", "/login", "login", requires_auth=False, response_schema=TokenOut, body=LoginIn),
+
+    # 👤 Rutas autenticadas
+    ProxyRoute("GET", "/me", "get_me", response_schema=UserOut, cache="normal"),
+
+    # 🧑‍⚕️ Rutas de administración
+    ProxyRoute("GET", "/admin/users", "list_users", response_schema=list[UserOut], cache="normal", linger=LIST_LINGER),
+    ProxyRoute("GET", "/admin/medicos", "list_medicos", response_schema=list[MedicoOut], cache="normal", linger=LIST_LINGER),
+    ProxyRoute("GET", "/admin/user-medico/{user_id}", "get_user_medico", response_schema=UserMedicoUpdateOut, cache="normal"),
+    ProxyRoute(
+        "PUT", "/admin/user-medico/{user_id}", "update_user_medico",
+        response_schema=UserMedicoUpdateOut,
+        body=UserMedicoUpdateIn,
+        invalidates=("/me", "/admin/users", "/admin/medicos", "/admin/user-medico/{user_id}", "/search", "/search/flexible"),
+    ),
+
+    # 🔍 Búsquedas
+    ProxyRoute(
+        "GET", "/search", "search_user_medico",
+        response_schema=SearchResult,
+        cache="short",
+        query={
+            "email": (str | None, Query(default=None)),
+            "tipo_doc": (str | None, Query(default=None)),
+            "doc": (str | None, Query(default=None)),
+        },
+    ),
+    ProxyRoute(
+        "GET", "/search/flexible", "search_flexible",
+        response_schema=list[SearchResult],
+        cache="short",
+        query={"q": (str, Query(..., description="Término de búsqueda obligatorio"))},
+    ),
+]
+
+add_proxy_routes(router, AUTH, "autenticación", ROUTES)
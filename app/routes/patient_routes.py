@@ -1,14 +1,14 @@
-from fastapi import APIRouter, HTTPException, Depends, Query, Path
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from __future__ import annotations
+
+from fastapi import APIRouter, Query
 from pydantic import BaseModel, EmailStr
-import httpx
-import os
 from typing import Optional, List
 
-router = APIRouter()
-security = HTTPBearer(auto_error=False)
+from app.core.batching import LIST_LINGER
+from app.core.http_client import PATIENT
+from app.core.proxy import ProxyRoute, add_proxy_routes
 
-PATIENT_SERVICE_URL = os.getenv("PATIENT_URL", "https://patientoncoassist.onrender.com")
+router = APIRouter()
 
 # ---------------------------
 # 📁 MODELOS Pydantic
@@ -41,14 +41,6 @@ class PatientUpdate(BaseModel):
     phone: Optional[str] = None
     address: Optional[str] = None
 
-class ValidationError(BaseModel):
-    loc: list[str | int]
-    msg: str
-    type: str
-
-class HTTPValidationError(BaseModel):
-    detail: list[ValidationError]
-
 class ClinicalHistoryCreate(BaseModel):
     document_id: str
     stage_at_diagnosis: str
@@ -71,125 +63,78 @@ class ClinicalHistoryUpdate(BaseModel):
 # 📁 PACIENTES
 # ---------------------------
 
-@router.get("/patients/", response_model=List[PatientRead])
-async def list_patients(
-    page: Optional[int] = Query(None, title="Page"),
-    page_size: Optional[int] = Query(None, title="Page Size"),
-    token: HTTPAuthorizationCredentials = Depends(security)
-):
-    params = {}
-    if page is not None:
-        params["page"] = page
-    if page_size is not None:
-        params["page_size"] = page_size
-
-    async with httpx.AsyncClient() as client:
-        response = await client.get(f"{PATIENT_SERVICE_URL}/patients/", params=params, headers={"authorization": f"Bearer {token.credentials}"} if token else {})
-    if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=response.text)
-    return response.json()
-
-@router.post("/patients/", response_model=PatientRead, status_code=201)
-async def create_patient(
-    patient: PatientCreate,
-    token: HTTPAuthorizationCredentials = Depends(security)
-):
-    async with httpx.AsyncClient() as client:
-        response = await client.post(f"{PATIENT_SERVICE_URL}/patients/", json=patient.dict(), headers={"authorization": f"Bearer {token.credentials}"} if token else {})
-    if response.status_code not in (200, 201):
-        raise HTTPException(status_code=response.status_code, detail=response.text)
-    return response.json()
-
-@router.get("/patients/{document_id}", response_model=PatientRead)
-async def get_patient(
-    document_id: str = Path(..., title="Document Id"),
-    token: HTTPAuthorizationCredentials = Depends(security)
-):
-    async with httpx.AsyncClient() as client:
-        response = await client.get(f"{PATIENT_SERVICE_URL}/patients/{document_id}", headers={"authorization": f"Bearer {token.credentials}"} if token else {})
-    if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=response.text)
-    return response.json()
-
-@router.patch("/patients/{document_id}", response_model=PatientRead)
-async def update_patient(
-    document_id: str = Path(..., title="Document Id"),
-    patient_update: PatientUpdate = None,
-    token: HTTPAuthorizationCredentials = Depends(security)
-):
-    async with httpx.AsyncClient() as client:
-        response = await client.patch(f"{PATIENT_SERVICE_URL}/patients/{document_id}", json=patient_update.dict(exclude_unset=True), headers={"authorization": f"Bearer {token.credentials}"} if token else {})
-    if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=response.text)
-    return response.json()
-
-@router.delete("/patients/{document_id}", status_code=204)
-async def delete_patient(
-    document_id: str = Path(..., title="Document Id"),
-    token: HTTPAuthorizationCredentials = Depends(security)
-):
-    async with httpx.AsyncClient() as client:
-        response = await client.delete(f"{PATIENT_SERVICE_URL}/patients/{document_id}", headers={"authorization": f"Bearer {token.credentials}"} if token else {})
-    if response.status_code not in (200, 204):
-        raise HTTPException(status_code=response.status_code, detail=response.text)
-    return None
+PATIENT_ROUTES = [
+    ProxyRoute(
+        "GET", "/patients/", "list_patients",
+        response_schema=List[PatientRead],
+        cache="normal",
+        linger=LIST_LINGER,
+        query={
+            "page": (Optional[int], Query(None, title="Page")),
+            "page_size": (Optional[int], Query(None, title="Page Size")),
+        },
+    ),
+    ProxyRoute(
+        "POST", "/patients/", "create_patient",
+        status_code=201,
+        response_schema=PatientRead,
+        body=PatientCreate,
+        invalidates=("/patients/",),
+    ),
+    ProxyRoute("GET", "/patients/{document_id}", "get_patient", response_schema=PatientRead, cache="long"),
+    ProxyRoute(
+        "PATCH", "/patients/{document_id}", "update_patient",
+        response_schema=PatientRead,
+        body=PatientUpdate,
+        invalidates=("/patients/", "/patients/{document_id}"),
+    ),
+    ProxyRoute(
+        "DELETE", "/patients/{document_id}", "delete_patient",
+        status_code=204,
+        invalidates=("/patients/", "/patients/{document_id}", "/clinical_histories/document/{document_id}"),
+    ),
+]
 
 # ---------------------------
 # 📁 HISTORIALES CLÍNICOS
 # ---------------------------
 
-@router.post("/clinical_histories/", response_model=ClinicalHistoryRead, status_code=201)
-async def create_clinical_history(
-    clinical_history: ClinicalHistoryCreate,
-    token: HTTPAuthorizationCredentials = Depends(security)
-):
-    async with httpx.AsyncClient() as client:
-        response = await client.post(f"{PATIENT_SERVICE_URL}/clinical_histories/", json=clinical_history.dict(), headers={"authorization": f"Bearer {token.credentials}"} if token else {})
-    if response.status_code not in (200, 201):
-        raise HTTPException(status_code=response.status_code, detail=response.text)
-    return response.json()
-
-@router.get("/clinical_histories/{history_id}", response_model=ClinicalHistoryRead)
-async def get_clinical_history(
-    history_id: int = Path(..., title="History Id"),
-    token: HTTPAuthorizationCredentials = Depends(security)
-):
-    async with httpx.AsyncClient() as client:
-        response = await client.get(f"{PATIENT_SERVICE_URL}/clinical_histories/{history_id}", headers={"authorization": f"Bearer {token.credentials}"} if token else {})
-    if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=response.text)
-    return response.json()
-
-@router.patch("/clinical_histories/{history_id}", response_model=ClinicalHistoryRead)
-async def update_clinical_history(
-    history_id: int = Path(..., title="History Id"),
-    clinical_history_update: ClinicalHistoryUpdate = None,
-    token: HTTPAuthorizationCredentials = Depends(security)
-):
-    async with httpx.AsyncClient() as client:
-        response = await client.patch(f"{PATIENT_SERVICE_URL}/clinical_histories/{history_id}", json=clinical_history_update.dict(exclude_unset=True), headers={"authorization": f"Bearer {token.credentials}"} if token else {})
-    if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=response.text)
-    return response.json()
-
-@router.delete("/clinical_histories/{history_id}", status_code=204)
-async def delete_clinical_history(
-    history_id: int = Path(..., title="History Id"),
-    token: HTTPAuthorizationCredentials = Depends(security)
-):
-    async with httpx.AsyncClient() as client:
-        response = await client.delete(f"{PATIENT_SERVICE_URL}/clinical_histories/{history_id}", headers={"authorization": f"Bearer {token.credentials}"} if token else {})
-    if response.status_code not in (200, 204):
-        raise HTTPException(status_code=response.status_code, detail=response.text)
-    return None
-
-@router.get("/clinical_histories/document/{document_id}", response_model=List[ClinicalHistoryRead])
-async def get_histories_by_document(
-    document_id: str = Path(..., title="Document Id"),
-    token: HTTPAuthorizationCredentials = Depends(security)
-):
-    async with httpx.AsyncClient() as client:
-        response = await client.get(f"{PATIENT_SERVICE_URL}/clinical_histories/document/{document_id}", headers={"authorization": f"Bearer {token.credentials}"} if token else {})
-    if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=response.text)
-    return response.json()
\ No newline at end of file
+HISTORY_ID = {"history_id": int}
+
+CLINICAL_HISTORY_ROUTES = [
+    ProxyRoute(
+        "POST", "/clinical_histories/", "create_clinical_history",
+        status_code=201,
+        response_schema=ClinicalHistoryRead,
+        body=ClinicalHistoryCreate,
+        invalidates_prefix=("/clinical_histories/document/",),
+    ),
+    ProxyRoute(
+        "GET", "/clinical_histories/{history_id}", "get_clinical_history",
+        response_schema=ClinicalHistoryRead,
+        path_types=HISTORY_ID,
+        cache="long",
+    ),
+    ProxyRoute(
+        "PATCH", "/clinical_histories/{history_id}", "update_clinical_history",
+        response_schema=ClinicalHistoryRead,
+        body=ClinicalHistoryUpdate,
+        path_types=HISTORY_ID,
+        invalidates=("/clinical_histories/{history_id}",),
+        invalidates_prefix=("/clinical_histories/document/",),
+    ),
+    ProxyRoute(
+        "DELETE", "/clinical_histories/{history_id}", "delete_clinical_history",
+        status_code=204,
+        path_types=HISTORY_ID,
+        invalidates=("/clinical_histories/{history_id}",),
+        invalidates_prefix=("/clinical_histories/document/",),
+    ),
+    ProxyRoute(
+        "GET", "/clinical_histories/document/{document_id}", "get_histories_by_document",
+        response_schema=List[ClinicalHistoryRead],
+        cache="long",
+    ),
+]
+
+add_proxy_routes(router, PATIENT, "pacientes", PATIENT_ROUTES + CLINICAL_HISTORY_ROUTES)
@@ -1,17 +1,21 @@
+from __future__ import annotations
+
 from fastapi import APIRouter, HTTPException, Depends, Request
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 import httpx
-import os
+import orjson
+
+from app.core.cache import invalidate, invalidate_prefix
+from app.core.config import TRUST_INPUT
+from app.core.http_client import RECOMMENDATION, send_stream, stream_response
+from app.core.openapi import json_body
+from app.core.proxy import ProxyRoute, add_proxy_routes, auth_headers, error_response
+from app.models.errors import HTTPValidationError
 
 router = APIRouter()
-security = HTTPBearer(auto_error=False)
 
-# URL del microservicio de predicción
-RECOMMENDATION_SERVICE_URL = os.getenv(
-    "RECOMMENDATION_URL",
-    "https://oncoai-4rec.onrender.com"
-)
+# La inferencia del modelo es más lenta que el resto de llamadas al servicio
+PREDICT_TIMEOUT = httpx.Timeout(connect=2, read=30, write=5, pool=2)
 
 # ---------------------------
 # 📁 MODELOS Pydantic
@@ -26,76 +30,82 @@ class TreatmentResponse(BaseModel):
     success: bool
     message: str
 
-class ValidationError(BaseModel):
-    loc: list[str | int]
-    msg: str
-    type: str
-
-class HTTPValidationError(BaseModel):
-    detail: list[ValidationError]
-
 # ---------------------------
 # 📁 ENDPOINTS
 # ---------------------------
 
-@router.get("/")
-async def root():
-    """
-    Root del microservicio de recomendación.
-    """
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(f"{RECOMMENDATION_SERVICE_URL}/")
-            response.raise_for_status()
-        except httpx.RequestError as e:
-            raise HTTPException(status_code=502, detail=f"Error de conexión: {str(e)}")
-    return response.json()
-
-
-@router.get("/health")
-async def health_check():
-    """
-    Verificación de salud del microservicio.
-    """
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(f"{RECOMMENDATION_SERVICE_URL}/health")
-            response.raise_for_status()
-        except httpx.RequestError as e:
-            raise HTTPException(status_code=502, detail=f"Error de conexión: {str(e)}")
-    return response.json()
+# Rutas del microservicio que se reenvían sin transformar. Las sondas de salud (Render,
+# balanceadores) reutilizan la respuesta durante 1 s para no despertar al upstream en cada ping
+ROUTES = [
+    ProxyRoute(
+        "GET", "/", "root",
+        requires_auth=False,
+        description="Root del microservicio de recomendación.",
+        memo=1.0,
+    ),
+    ProxyRoute(
+        "GET", "/health", "health_check",
+        requires_auth=False,
+        description="Verificación de salud del microservicio.",
+        memo=1.0,
+    ),
+]
+
+add_proxy_routes(router, RECOMMENDATION, "recomendación", ROUTES)
+
+
+# Cuerpo de la predicción como (history_id, contenido a reenviar)
+async def _validated_body(request_data: HistoryIdRequest) -> tuple[int | None, str | bytes]:
+    return request_data.history_id, request_data.model_dump_json()
+
+async def _trusted_body(request: Request) -> tuple[int | None, str | bytes]:
+    # TRUST_INPUT: se reenvían los bytes tal cual; solo se lee el id para invalidar la caché
+    body = await request.body()
+    try:
+        history_id = orjson.loads(body).get("history_id")
+    except (orjson.JSONDecodeError, AttributeError):
+        history_id = None
+    return history_id, body
+
+prediction_body = _trusted_body if TRUST_INPUT else _validated_body
 
 
 @router.post(
     "/api/v1/predict-and-update",
-    response_model=TreatmentResponse,
     responses={
+        200: {"model": TreatmentResponse},
         422: {"model": HTTPValidationError}
     },
     tags=["prediction"],
     summary="Predict And Update Treatment",
-    description="Predecir tratamiento y actualizar en Oncoassist.\nFlujo: GET historia → Extraer datos → Predecir → PATCH"
+    description="Predecir tratamiento y actualizar en Oncoassist.\nFlujo: GET historia → Extraer datos → Predecir → PATCH",
+    openapi_extra=json_body(HistoryIdRequest) if TRUST_INPUT else None
 )
 async def predict_and_update_treatment(
-    request_data: HistoryIdRequest,
-    token: HTTPAuthorizationCredentials = Depends(security)
+    body: tuple[int | None, str | bytes] = Depends(prediction_body),
+    headers: dict[str, str] = Depends(auth_headers(required=False, content_type="application/json"))
 ):
     """
     Endpoint principal de predicción y actualización de tratamiento.
     """
-    headers = {"Authorization": f"Bearer {token.credentials}"} if token else {}
-
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(
-                f"{RECOMMENDATION_SERVICE_URL}/api/v1/predict-and-update",
-                json=request_data.dict(),
-                headers=headers
-            )
-        except httpx.RequestError as e:
-            raise HTTPException(status_code=502, detail=f"Error al conectar con el servicio de predicción: {str(e)}")
+    history_id, content = body
+    try:
+        response = await send_stream(
+            RECOMMENDATION,
+            "POST",
+            "/api/v1/predict-and-update",
+            content=content,
+            headers=headers,
+            timeout=PREDICT_TIMEOUT
+        )
+    except httpx.RequestError as e:
+        raise HTTPException(status_code=502, detail=f"Error al conectar con el servicio de predicción: {str(e)}")
 
     if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=response.text)
+        return await error_response(response)
 
-    return response.json()
+    # El servicio de predicción actualiza la historia clínica en Oncoassist
+    if history_id is not None:
+        await invalidate(f"/clinical_histories/{history_id}")
+    await invalidate_prefix("/clinical_histories/document/")
+    return stream_response(response)